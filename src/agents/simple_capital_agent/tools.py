@@ -1,8 +1,36 @@
+from collections.abc import Mapping
+
 from countryinfo import CountryInfo
 
+# Read-only lookup tables packed into shared memory by the pre-fork server
+# (src/server) before it forks workers; stays empty under plain `adk web`.
+shared_caches: dict[str, Mapping[str, str]] = {}
+
+
+def build_capital_index() -> dict[str, str]:
+  """Map every country name and alternate spelling (lower-cased) to its capital."""
+  index = {}
+  for name, info in CountryInfo().all().items():
+      capital = info.get("capital")
+      if not capital:
+          continue
+      for alias in [name, *info.get("altSpellings", [])]:
+          index.setdefault(alias.lower(), capital)
+  return index
+
+
+SHARED_CACHE_BUILDERS = {"capitals": build_capital_index}
+
 
 def get_capital_name(country: str) -> str:
   """Return the capital name for the provided country via CountryInfo."""
+  capitals = shared_caches.get("capitals")
+  if capitals is not None:
+      capital = capitals.get(country.lower())
+      if capital:
+          return capital
+
+  # CountryInfo re-reads every country JSON file on construction.
   capital_finder = CountryInfo(country)
   capital = capital_finder.capital()
 
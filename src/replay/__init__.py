@@ -0,0 +1 @@
+# Record agent runs to trace files and replay them offline to catch cost/latency regressions.
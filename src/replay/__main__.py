@@ -0,0 +1,173 @@
+"""Record agent runs to traces and replay them offline against regression thresholds.
+
+Usage (from the repo root):
+    uv run python -m src.replay record loop_seq_writer_critic_agent -m "A lighthouse keeper"
+    uv run python -m src.replay replay            # every trace under traces/
+"""
+import argparse
+import asyncio
+import glob
+import os
+import sys
+
+from .constants import RECORDED_TOOLS, TRACE_SUFFIX, TRACES_DIR
+from .harness import Thresholds, compare, record, warm_replay
+from .trace import ReplayDivergence, load_trace, save_trace
+
+_REPORTED_METRICS = (
+    "model_calls",
+    "tool_calls",
+    "unmatched_model_calls",
+    "unmatched_tool_calls",
+    "total_tokens",
+    "overhead_ms",
+)
+
+
+def _parse_state(pairs: list[str]) -> dict:
+    state = {}
+    for pair in pairs:
+        key, separator, value = pair.partition("=")
+        if not separator:
+            raise SystemExit(f"--state expects key=value, got {pair!r}")
+        state[key] = value
+    return state
+
+
+def _split_names(value: str | None) -> frozenset[str]:
+    return frozenset(name.strip() for name in (value or "").split(",") if name.strip())
+
+
+def _record(args: argparse.Namespace) -> int:
+    output = args.output or os.path.join(TRACES_DIR, args.agent + TRACE_SUFFIX)
+    trace = asyncio.run(
+        record(
+            args.agent,
+            args.message,
+            _parse_state(args.state),
+            _split_names(args.recorded_tools),
+        )
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    save_trace(output, trace)
+    metrics = trace["metrics"]
+    print(
+        f"recorded {args.agent} -> {output}: {metrics['model_calls']} model calls,"
+        f" {metrics['tool_calls']} tool calls, {metrics['total_tokens']} tokens,"
+        f" iterations {metrics['iterations']}"
+    )
+    return 0
+
+
+def _format(value) -> str:
+    return f"{value:.1f}" if isinstance(value, float) else str(value)
+
+
+def _replay(args: argparse.Namespace) -> int:
+    paths = args.traces or sorted(glob.glob(os.path.join(TRACES_DIR, "*" + TRACE_SUFFIX)))
+    if not paths:
+        print(f"no traces found in {TRACES_DIR}", file=sys.stderr)
+        return 1
+    thresholds = Thresholds(
+        max_extra_model_calls=args.max_extra_model_calls,
+        max_extra_tool_calls=args.max_extra_tool_calls,
+        max_extra_iterations=args.max_extra_iterations,
+        max_token_ratio=args.max_token_ratio,
+        max_overhead_ratio=args.max_overhead_ratio,
+        overhead_slack_ms=args.overhead_slack_ms,
+    )
+
+    failed = 0
+    for path in paths:
+        trace = load_trace(path)
+        print(f"== {trace['agent']} ({path}, recorded {trace['recorded_at']})")
+        try:
+            metrics = asyncio.run(warm_replay(trace, _split_names(args.recorded_tools)))
+        except Exception as error:
+            # ADK re-raises plugin errors as RuntimeError chained to the original.
+            if isinstance(error.__cause__, ReplayDivergence):
+                print(f"  FAIL diverged from trace: {error.__cause__}")
+            else:
+                print(f"  FAIL replay raised {type(error).__name__}: {error}")
+            failed += 1
+            continue
+
+        baseline = trace["metrics"]
+        # Overhead is judged against the offline replay taken at record time, as in compare().
+        overhead_baseline = trace.get("replay_metrics", baseline)
+        for name in _REPORTED_METRICS:
+            recorded = (overhead_baseline if name == "overhead_ms" else baseline).get(name, 0)
+            print(f"  {name:<22} {_format(recorded):>10} -> {_format(metrics[name])}")
+        for loop_name, iterations in metrics["iterations"].items():
+            recorded = baseline["iterations"].get(loop_name, 0)
+            print(f"  {loop_name + ' iterations':<22} {recorded:>10} -> {iterations}")
+
+        failures = compare(trace, metrics, thresholds)
+        for failure in failures:
+            print(f"  FAIL {failure}")
+        if failures:
+            failed += 1
+        else:
+            print("  ok")
+
+    print(f"{len(paths) - failed}/{len(paths)} traces within thresholds")
+    return 1 if failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Run an agent live and save its trace.")
+    record_parser.add_argument("agent", help="Agent package under src/agents.")
+    record_parser.add_argument(
+        "-m", "--message", action="append", required=True,
+        help="User message; repeat for multi-turn runs.",
+    )
+    record_parser.add_argument(
+        "--state", action="append", default=[], metavar="KEY=VALUE",
+        help="Initial session state entry; repeatable.",
+    )
+    record_parser.add_argument(
+        "-o", "--output", help=f"Trace path (default: traces/<agent>{TRACE_SUFFIX})."
+    )
+    record_parser.add_argument(
+        "--recorded-tools", default=RECORDED_TOOLS,
+        help="Comma-separated network-bound tools whose recorded results replay serves"
+        " instead of running them; stored in the trace.",
+    )
+    record_parser.set_defaults(handler=_record)
+
+    defaults = Thresholds()
+    replay_parser = commands.add_parser(
+        "replay", help="Replay traces offline and fail on regressions."
+    )
+    replay_parser.add_argument("traces", nargs="*", help="Trace files (default: all in traces/).")
+    replay_parser.add_argument(
+        "--max-extra-model-calls", type=int, default=defaults.max_extra_model_calls
+    )
+    replay_parser.add_argument(
+        "--max-extra-tool-calls", type=int, default=defaults.max_extra_tool_calls
+    )
+    replay_parser.add_argument(
+        "--max-extra-iterations", type=int, default=defaults.max_extra_iterations
+    )
+    replay_parser.add_argument("--max-token-ratio", type=float, default=defaults.max_token_ratio)
+    replay_parser.add_argument(
+        "--max-overhead-ratio", type=float, default=defaults.max_overhead_ratio
+    )
+    replay_parser.add_argument(
+        "--overhead-slack-ms", type=float, default=defaults.overhead_slack_ms
+    )
+    replay_parser.add_argument(
+        "--recorded-tools", default=RECORDED_TOOLS,
+        help="Further tools to serve from the trace, on top of those it was recorded with.",
+    )
+    replay_parser.set_defaults(handler=_replay)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+from dotenv import load_dotenv
+import os
+
+# Traces are checked in next to the code they guard: <repo>/traces/<agent>.trace.json.gz
+TRACES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "traces"
+)
+TRACE_SUFFIX = ".trace.json.gz"
+TRACE_VERSION = 1
+
+APP_NAME = "replay_app"
+USER_ID = "replay_user"
+
+load_dotenv(override=True)
+
+# Tools that need the network: replay serves their recorded result instead of running them.
+# Every other tool runs for real and is diffed against the trace. Comma-separated.
+RECORDED_TOOLS = os.getenv("REPLAY_RECORDED_TOOLS", "")
+
+# --- Regression thresholds (replayed run vs. recorded baseline) ---
+# Extra model / tool calls allowed per run.
+MAX_EXTRA_MODEL_CALLS = int(os.getenv("REPLAY_MAX_EXTRA_MODEL_CALLS", "0"))
+MAX_EXTRA_TOOL_CALLS = int(os.getenv("REPLAY_MAX_EXTRA_TOOL_CALLS", "0"))
+# Extra LoopAgent iterations allowed, per loop.
+MAX_EXTRA_ITERATIONS = int(os.getenv("REPLAY_MAX_EXTRA_ITERATIONS", "0"))
+# Allowed growth of total tokens, as a ratio of the baseline.
+MAX_TOKEN_RATIO = float(os.getenv("REPLAY_MAX_TOKEN_RATIO", "1.10"))
+# Allowed growth of framework overhead: ratio of the baseline plus an absolute slack for timer noise.
+MAX_OVERHEAD_RATIO = float(os.getenv("REPLAY_MAX_OVERHEAD_RATIO", "1.50"))
+OVERHEAD_SLACK_MS = float(os.getenv("REPLAY_OVERHEAD_SLACK_MS", "50"))
@@ -0,0 +1,160 @@
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from google.adk.agents import BaseAgent
+from google.adk.apps import App
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from ..server.agents import import_agent
+from ..server.constants import AGENTS_DIR
+from .constants import (
+    APP_NAME,
+    MAX_EXTRA_ITERATIONS,
+    MAX_EXTRA_MODEL_CALLS,
+    MAX_EXTRA_TOOL_CALLS,
+    MAX_OVERHEAD_RATIO,
+    MAX_TOKEN_RATIO,
+    OVERHEAD_SLACK_MS,
+    TRACE_VERSION,
+    USER_ID,
+)
+from .trace import TracePlugin
+
+
+@dataclass
+class Thresholds:
+    max_extra_model_calls: int = MAX_EXTRA_MODEL_CALLS
+    max_extra_tool_calls: int = MAX_EXTRA_TOOL_CALLS
+    max_extra_iterations: int = MAX_EXTRA_ITERATIONS
+    max_token_ratio: float = MAX_TOKEN_RATIO
+    max_overhead_ratio: float = MAX_OVERHEAD_RATIO
+    overhead_slack_ms: float = OVERHEAD_SLACK_MS
+
+
+def load_root_agent(agent_name: str) -> BaseAgent:
+    return import_agent(AGENTS_DIR, agent_name).root_agent
+
+
+async def run_agent(
+    root_agent: BaseAgent, messages: list[str], initial_state: dict, plugin: TracePlugin
+) -> float:
+    """Send each message in turn through one session; returns wall time in ms."""
+    session_service = InMemorySessionService()
+    session = await session_service.create_session(
+        app_name=APP_NAME, user_id=USER_ID, state=initial_state
+    )
+    runner = Runner(
+        app=App(name=APP_NAME, root_agent=root_agent, plugins=[plugin]),
+        session_service=session_service,
+    )
+    start_ms = plugin.elapsed_ms()
+    for message in messages:
+        content = types.Content(role="user", parts=[types.Part(text=message)])
+        async for _ in runner.run_async(
+            user_id=USER_ID, session_id=session.id, new_message=content
+        ):
+            pass
+    return plugin.elapsed_ms() - start_ms
+
+
+async def record(
+    agent_name: str,
+    messages: list[str],
+    initial_state: dict,
+    recorded_tools: frozenset[str] = frozenset(),
+) -> dict:
+    """Run an agent live and return its trace, including a warm offline replay.
+
+    Framework overhead is only comparable between offline runs, so the trace
+    keeps the metrics of an immediate replay as the overhead baseline.
+    """
+    root_agent = load_root_agent(agent_name)
+    plugin = TracePlugin()
+    wall_ms = await run_agent(root_agent, messages, initial_state, plugin)
+    trace = {
+        "version": TRACE_VERSION,
+        "agent": agent_name,
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "model": next((c["request"]["model"] for c in plugin.model_calls), None),
+        "messages": messages,
+        "initial_state": initial_state,
+        "recorded_tools": sorted(recorded_tools),
+        "model_calls": plugin.model_calls,
+        "tool_calls": plugin.tool_calls,
+        "state_deltas": plugin.state_deltas,
+        "metrics": plugin.metrics(root_agent, wall_ms),
+    }
+    trace["replay_metrics"] = await warm_replay(trace)
+    return trace
+
+
+async def replay(trace: dict, recorded_tools: frozenset[str] = frozenset()) -> dict:
+    """Re-run the trace's root_agent against its recordings and return the run's metrics.
+
+    recorded_tools adds to the tools the trace was recorded with as network-bound.
+    """
+    # Agents build LiteLlm(model=LLM_MODEL_NAME) at import time; the model is never
+    # called on replay, so the recorded name is enough when no .env is present.
+    if trace["model"]:
+        os.environ.setdefault("LLM_MODEL_NAME", trace["model"])
+    root_agent = load_root_agent(trace["agent"])
+    plugin = TracePlugin(
+        trace, frozenset(trace.get("recorded_tools", ())) | recorded_tools
+    )
+    wall_ms = await run_agent(root_agent, trace["messages"], trace["initial_state"], plugin)
+    return plugin.metrics(root_agent, wall_ms)
+
+
+async def warm_replay(trace: dict, recorded_tools: frozenset[str] = frozenset()) -> dict:
+    """Replay twice and return the second run's metrics.
+
+    The first replay in a process pays one-time ADK, pydantic and OpenTelemetry
+    setup inside its timed window. Discarding it lets the baseline taken right
+    after recording and a fresh CI process both measure a warm run.
+    """
+    await replay(trace, recorded_tools)
+    return await replay(trace, recorded_tools)
+
+
+def compare(trace: dict, metrics: dict, thresholds: Thresholds) -> list[str]:
+    """Return one message per threshold the replayed metrics exceed (empty means pass)."""
+    baseline = trace["metrics"]
+    failures = [f"tool changed: {mismatch}" for mismatch in metrics["tool_mismatches"]]
+
+    extra_model_calls = metrics["model_calls"] - baseline["model_calls"]
+    if extra_model_calls > thresholds.max_extra_model_calls:
+        failures.append(
+            f"model calls {baseline['model_calls']} -> {metrics['model_calls']}"
+            f" (+{extra_model_calls} > +{thresholds.max_extra_model_calls})"
+        )
+    extra_tool_calls = metrics["tool_calls"] - baseline["tool_calls"]
+    if extra_tool_calls > thresholds.max_extra_tool_calls:
+        failures.append(
+            f"tool calls {baseline['tool_calls']} -> {metrics['tool_calls']}"
+            f" (+{extra_tool_calls} > +{thresholds.max_extra_tool_calls})"
+        )
+    for loop_name, iterations in metrics["iterations"].items():
+        recorded = baseline["iterations"].get(loop_name, 0)
+        if iterations - recorded > thresholds.max_extra_iterations:
+            failures.append(
+                f"{loop_name} iterations {recorded} -> {iterations}"
+                f" (+{iterations - recorded} > +{thresholds.max_extra_iterations})"
+            )
+    if metrics["total_tokens"] > baseline["total_tokens"] * thresholds.max_token_ratio:
+        failures.append(
+            f"tokens {baseline['total_tokens']} -> {metrics['total_tokens']}"
+            f" (> x{thresholds.max_token_ratio:.2f})"
+        )
+    overhead_baseline = trace.get("replay_metrics", baseline)["overhead_ms"]
+    overhead_limit = (
+        overhead_baseline * thresholds.max_overhead_ratio + thresholds.overhead_slack_ms
+    )
+    if metrics["overhead_ms"] > overhead_limit:
+        failures.append(
+            f"framework overhead {overhead_baseline:.1f} ms -> {metrics['overhead_ms']:.1f} ms"
+            f" (> {overhead_limit:.1f} ms)"
+        )
+    return failures
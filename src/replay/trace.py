@@ -0,0 +1,316 @@
+import gzip
+import json
+import time
+from collections import Counter, defaultdict, deque
+from typing import Any, Optional
+
+from google.adk.agents import BaseAgent, LoopAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.events import Event
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from .constants import TRACE_VERSION
+
+
+class ReplayDivergence(Exception):
+    """The replayed run asked for something the trace has no recording of."""
+
+
+def save_trace(path: str, trace: dict) -> None:
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        json.dump(trace, file, separators=(",", ":"), default=str)
+
+
+def load_trace(path: str) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        trace = json.load(file)
+    if trace.get("version") != TRACE_VERSION:
+        raise ValueError(f"{path}: unsupported trace version {trace.get('version')!r}")
+    return trace
+
+
+def _request_record(llm_request: LlmRequest) -> dict:
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if instruction is not None and not isinstance(instruction, str):
+        instruction = json.dumps(
+            instruction.model_dump(mode="json", exclude_none=True), sort_keys=True
+        )
+    return {
+        "model": llm_request.model,
+        "system_instruction": instruction,
+        "contents": [c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents],
+        "tools": sorted(llm_request.tools_dict),
+    }
+
+
+def _request_chars(request: dict) -> int:
+    """Size of what is sent to the model; used to scale prompt tokens on replay."""
+    return len(request["system_instruction"] or "") + len(
+        json.dumps(request["contents"], separators=(",", ":"))
+    )
+
+
+def _usage_record(llm_response: LlmResponse) -> dict:
+    usage = llm_response.usage_metadata
+    if usage is None:
+        return {"prompt": 0, "completion": 0}
+    return {
+        "prompt": usage.prompt_token_count or 0,
+        "completion": usage.candidates_token_count or 0,
+    }
+
+
+def _normalized(value: Any) -> Any:
+    """The value as it reads back from a trace file, so live and recorded data compare equal."""
+    return json.loads(json.dumps(value, default=str))
+
+
+def _actions_record(tool_context: ToolContext) -> dict:
+    actions = tool_context.actions
+    return {
+        "escalate": actions.escalate,
+        "transfer_to_agent": actions.transfer_to_agent,
+        "skip_summarization": actions.skip_summarization,
+        "state_delta": dict(actions.state_delta),
+    }
+
+
+def _short(value: Any, limit: int = 80) -> str:
+    text = json.dumps(value, default=str)
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def _busy_ms(intervals: list[tuple[float, float]]) -> float:
+    """Total time covered by the intervals; ParallelAgent calls overlap."""
+    busy, end = 0.0, float("-inf")
+    for start, stop in sorted(intervals):
+        if stop <= end:
+            continue
+        busy += stop - max(start, end)
+        end = stop
+    return busy
+
+
+def _loop_agents(agent: BaseAgent) -> list[LoopAgent]:
+    loops = [agent] if isinstance(agent, LoopAgent) else []
+    for sub_agent in agent.sub_agents:
+        loops.extend(_loop_agents(sub_agent))
+    return loops
+
+
+class TracePlugin(BasePlugin):
+    """Captures model calls, tool calls, state deltas and timings of agent runs.
+
+    Without a trace it records live calls. Given a recorded trace it replays:
+    model responses are served per agent in recorded order, so the run needs no
+    network. Tools run for real and their results and actions (e.g. exit_loop's
+    escalate) are diffed against the recording, so a change to a tool's code
+    shows up. Only tools named in recorded_tools, those that need the network,
+    get their recorded result and actions served instead. When an agent asks for
+    more calls than were recorded, its last recording is served again and
+    counted as unmatched. A call with no recording at all raises
+    ReplayDivergence, which ADK's plugin manager re-raises as a RuntimeError
+    with the divergence as its __cause__.
+    """
+
+    def __init__(
+        self, trace: Optional[dict] = None, recorded_tools: frozenset[str] = frozenset()
+    ):
+        super().__init__(name="trace")
+        self.replaying = trace is not None
+        self.recorded_tools = recorded_tools
+        self.model_calls: list[dict] = []
+        self.tool_calls: list[dict] = []
+        self.state_deltas: list[dict] = []
+        self.agent_runs: Counter[str] = Counter()
+        self.unmatched_model_calls = 0
+        self.unmatched_tool_calls = 0
+        self.tool_mismatches: list[str] = []
+        self._origin = time.perf_counter()
+        self._pending_models: dict[tuple[str, str], dict] = {}
+        self._pending_tools: dict[str, dict] = {}
+        self._recorded_models: dict[str, deque] = defaultdict(deque)
+        self._recorded_tools: dict[tuple[str, str], deque] = defaultdict(deque)
+        self._last_models: dict[str, dict] = {}
+        self._last_tools: dict[tuple[str, str], dict] = {}
+        # function_call_id -> recording a live tool call is diffed against.
+        self._expected_tools: dict[str, dict] = {}
+        if trace is not None:
+            for call in trace["model_calls"]:
+                self._recorded_models[call["agent"]].append(call)
+            for call in trace["tool_calls"]:
+                self._recorded_tools[(call["agent"], call["tool"])].append(call)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._origin) * 1000
+
+    async def before_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> None:
+        self.agent_runs[agent.name] += 1
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        call = {
+            "agent": callback_context.agent_name,
+            "request": _request_record(llm_request),
+            "start_ms": self.elapsed_ms(),
+        }
+        if not self.replaying:
+            self._pending_models[(callback_context.invocation_id, call["agent"])] = call
+            return None
+
+        recorded_calls = self._recorded_models[call["agent"]]
+        if recorded_calls:
+            recorded = recorded_calls.popleft()
+            self._last_models[call["agent"]] = recorded
+        elif call["agent"] in self._last_models:
+            recorded = self._last_models[call["agent"]]
+            self.unmatched_model_calls += 1
+        else:
+            raise ReplayDivergence(
+                f"agent {call['agent']!r} called the model but the trace has no recording for it"
+            )
+        usage = dict(recorded["usage"])
+        recorded_chars = _request_chars(recorded["request"])
+        if recorded_chars:
+            # Prompt tokens follow the live request (e.g. an edited instruction).
+            usage["prompt"] = round(
+                usage["prompt"] * _request_chars(call["request"]) / recorded_chars
+            )
+        call.update(response=recorded["response"], usage=usage, end_ms=self.elapsed_ms())
+        self.model_calls.append(call)
+        return LlmResponse.model_validate(recorded["response"])
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> None:
+        if llm_response.partial:
+            return
+        call = self._pending_models.pop(
+            (callback_context.invocation_id, callback_context.agent_name), None
+        )
+        if call is None:
+            return
+        call.update(
+            response=llm_response.model_dump(mode="json", exclude_none=True),
+            usage=_usage_record(llm_response),
+            end_ms=self.elapsed_ms(),
+        )
+        self.model_calls.append(call)
+
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext
+    ) -> Optional[dict]:
+        call = {
+            "agent": tool_context.agent_name,
+            "tool": tool.name,
+            "args": tool_args,
+            "start_ms": self.elapsed_ms(),
+        }
+        self._pending_tools[tool_context.function_call_id] = call
+        if not self.replaying:
+            return None
+
+        key = (call["agent"], call["tool"])
+        recorded_calls = self._recorded_tools[key]
+        if call["tool"] not in self.recorded_tools:
+            # Run the tool for real; after_tool_callback diffs it against the recording.
+            if recorded_calls:
+                self._expected_tools[tool_context.function_call_id] = recorded_calls.popleft()
+            else:
+                self.unmatched_tool_calls += 1
+            return None
+
+        if recorded_calls:
+            recorded = recorded_calls.popleft()
+            self._last_tools[key] = recorded
+        elif key in self._last_tools:
+            recorded = self._last_tools[key]
+            self.unmatched_tool_calls += 1
+        else:
+            raise ReplayDivergence(
+                f"agent {call['agent']!r} called tool {call['tool']!r} but the trace has no recording for it"
+            )
+        # Re-apply what the tool did besides returning, e.g. a transfer or state write.
+        actions = recorded["actions"]
+        tool_context.actions.escalate = actions.get("escalate")
+        tool_context.actions.transfer_to_agent = actions.get("transfer_to_agent")
+        tool_context.actions.skip_summarization = actions.get("skip_summarization")
+        for key, value in actions.get("state_delta", {}).items():
+            tool_context.state[key] = value
+        return recorded["result"]
+
+    async def after_tool_callback(
+        self,
+        *,
+        tool: BaseTool,
+        tool_args: dict[str, Any],
+        tool_context: ToolContext,
+        result: dict,
+    ) -> None:
+        call = self._pending_tools.pop(tool_context.function_call_id, None)
+        if call is None:
+            return
+        call.update(
+            result=result, actions=_actions_record(tool_context), end_ms=self.elapsed_ms()
+        )
+        self.tool_calls.append(call)
+
+        expected = self._expected_tools.pop(tool_context.function_call_id, None)
+        if expected is None:
+            return
+        name = f"{call['agent']}.{call['tool']}"
+        live_result, recorded_result = _normalized(call["result"]), _normalized(expected["result"])
+        if live_result != recorded_result:
+            self.tool_mismatches.append(
+                f"{name} result {_short(recorded_result)} -> {_short(live_result)}"
+            )
+        live_actions, recorded_actions = (
+            _normalized(call["actions"]), _normalized(expected["actions"])
+        )
+        for action in sorted(live_actions.keys() | recorded_actions.keys()):
+            if live_actions.get(action) != recorded_actions.get(action):
+                self.tool_mismatches.append(
+                    f"{name} {action} {_short(recorded_actions.get(action))}"
+                    f" -> {_short(live_actions.get(action))}"
+                )
+
+    async def on_event_callback(self, *, invocation_context, event: Event) -> None:
+        if event.actions and event.actions.state_delta:
+            self.state_deltas.append(
+                {"agent": event.author, "delta": dict(event.actions.state_delta)}
+            )
+
+    def metrics(self, root_agent: BaseAgent, wall_ms: float) -> dict:
+        model_intervals = [(c["start_ms"], c["end_ms"]) for c in self.model_calls]
+        tool_intervals = [(c["start_ms"], c["end_ms"]) for c in self.tool_calls]
+        prompt_tokens = sum(c["usage"]["prompt"] for c in self.model_calls)
+        completion_tokens = sum(c["usage"]["completion"] for c in self.model_calls)
+        return {
+            "model_calls": len(self.model_calls),
+            "tool_calls": len(self.tool_calls),
+            "unmatched_model_calls": self.unmatched_model_calls,
+            "unmatched_tool_calls": self.unmatched_tool_calls,
+            "tool_mismatches": list(self.tool_mismatches),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            # A loop's iterations are the runs of its first sub-agent.
+            "iterations": {
+                loop.name: self.agent_runs[loop.sub_agents[0].name]
+                for loop in _loop_agents(root_agent)
+                if loop.sub_agents
+            },
+            "agent_runs": dict(self.agent_runs),
+            "wall_ms": wall_ms,
+            "model_ms": _busy_ms(model_intervals),
+            "tool_ms": _busy_ms(tool_intervals),
+            # Time spent in ADK itself: wall time not covered by a model or tool call.
+            "overhead_ms": wall_ms - _busy_ms(model_intervals + tool_intervals),
+        }
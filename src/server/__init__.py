@@ -0,0 +1 @@
+# Pre-fork server that warms every agent under src/agents once and forks workers from it.
@@ -0,0 +1,107 @@
+"""Serve every agent under src/agents from pre-forked, pre-warmed workers.
+
+Usage (from the repo root):
+    uv run python -m src.server --workers 4 --max-worker-memory-mb 512
+"""
+import argparse
+import functools
+import logging
+import sys
+
+from google.adk.cli.fast_api import get_fast_api_app
+from google.adk.cli.service_registry import get_service_registry
+
+from .agents import discover_agents, pack_shared_caches, warm_agents
+from .constants import (
+    AGENTS_DIR,
+    GRACEFUL_TIMEOUT,
+    HOST,
+    MAX_WORKER_MEMORY_MB,
+    MEMORY_CHECK_INTERVAL,
+    PORT,
+    SKIP_AGENTS,
+    WORKERS,
+)
+from .prefork import PreforkServer, bind_socket
+
+
+def _prepare_session_store(session_service_uri: str) -> None:
+    """Create the session tables once, before any worker races to create them.
+
+    The engine is disposed again so the parent holds no pooled connection that
+    forked workers would inherit.
+    """
+    session_service = get_service_registry().create_session_service(
+        session_service_uri, agents_dir=AGENTS_DIR
+    )
+    engine = getattr(session_service, "db_engine", None)
+    if engine is not None:
+        engine.dispose()
+
+
+def _split_names(value: str | None) -> list[str]:
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument(
+        "--agents",
+        help="Comma-separated agent packages to warm (default: all under src/agents).",
+    )
+    parser.add_argument(
+        "--skip-agents",
+        default=SKIP_AGENTS,
+        help="Comma-separated agent packages not to warm when --agents is not given.",
+    )
+    parser.add_argument(
+        "--session-service-uri",
+        help="Session store shared by all workers (default: in-memory, per worker).",
+    )
+    parser.add_argument("--max-worker-memory-mb", type=int, default=MAX_WORKER_MEMORY_MB)
+    parser.add_argument("--memory-check-interval", type=float, default=MEMORY_CHECK_INTERVAL)
+    parser.add_argument("--graceful-timeout", type=int, default=GRACEFUL_TIMEOUT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(message)s")
+
+    if args.agents:
+        names = _split_names(args.agents)
+    else:
+        skipped = set(_split_names(args.skip_agents))
+        names = [name for name in discover_agents(AGENTS_DIR) if name not in skipped]
+    modules = warm_agents(AGENTS_DIR, names)
+    pack_shared_caches(modules)
+
+    build_app = functools.partial(
+        get_fast_api_app,
+        agents_dir=AGENTS_DIR,
+        session_service_uri=args.session_service_uri,
+        web=True,
+        host=args.host,
+        port=args.port,
+    )
+    if args.session_service_uri:
+        # A database session service opens its engine (and a pooled connection)
+        # while the app is built, so build it per worker: no connection may cross fork().
+        _prepare_session_store(args.session_service_uri)
+        app_factory = build_app
+    else:
+        app = build_app()
+        app_factory = lambda: app
+    sock = bind_socket(args.host, args.port)
+    return PreforkServer(
+        app_factory,
+        sock,
+        workers=args.workers,
+        max_worker_memory_mb=args.max_worker_memory_mb,
+        memory_check_interval=args.memory_check_interval,
+        graceful_timeout=args.graceful_timeout,
+    ).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
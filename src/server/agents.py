@@ -0,0 +1,68 @@
+import importlib
+import logging
+import os
+import sys
+from types import ModuleType
+
+from .shared_store import SharedStore
+
+
+def discover_agents(agents_dir: str) -> list[str]:
+    """Return the agent package names under agents_dir, the same set `adk web` lists."""
+    return sorted(
+        name
+        for name in os.listdir(agents_dir)
+        if not name.startswith((".", "_"))
+        and os.path.isfile(os.path.join(agents_dir, name, "__init__.py"))
+    )
+
+
+def import_agent(agents_dir: str, name: str) -> ModuleType:
+    """Import an agent package under the top-level name ADK's AgentLoader uses.
+
+    The loader resolves agents with importlib.import_module(name) after putting
+    agents_dir on sys.path, so a module imported here is reused from sys.modules.
+    """
+    if agents_dir not in sys.path:
+        sys.path.insert(0, agents_dir)
+    return importlib.import_module(name)
+
+
+def warm_agents(agents_dir: str, names: list[str]) -> dict[str, ModuleType]:
+    """Import every agent once; an agent that fails to import is skipped, not fatal."""
+    modules = {}
+    for name in names:
+        try:
+            modules[name] = import_agent(agents_dir, name)
+        except Exception:
+            logging.exception("prefork: failed to warm agent %s, skipping", name)
+            continue
+        logging.info("prefork: warmed agent %s", name)
+    return modules
+
+
+def pack_shared_caches(modules: dict[str, ModuleType]) -> None:
+    """Build each agent's read-only lookup tables into shared memory.
+
+    An agent opts in by exposing, in its tools module, SHARED_CACHE_BUILDERS
+    (cache name -> zero-arg function returning dict[str, str]) and a
+    shared_caches dict the packed SharedStore is published into.
+    """
+    for name in modules:
+        tools = sys.modules.get(f"{name}.tools")
+        builders = getattr(tools, "SHARED_CACHE_BUILDERS", None)
+        if not builders:
+            continue
+        for cache_name, build in builders.items():
+            try:
+                store = SharedStore.build(build())
+            except Exception:
+                logging.exception(
+                    "prefork: failed to build %s.%s, agent runs uncached", name, cache_name
+                )
+                continue
+            tools.shared_caches[cache_name] = store
+            logging.info(
+                "prefork: packed %s.%s (%d entries, %d bytes)",
+                name, cache_name, len(store), store.nbytes,
+            )
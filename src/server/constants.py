@@ -0,0 +1,18 @@
+from dotenv import load_dotenv
+import os
+
+# Agent packages live next to this one: src/agents/<agent>/
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents")
+
+load_dotenv(override=True)
+
+HOST = os.getenv("PREFORK_HOST", "127.0.0.1")
+PORT = int(os.getenv("PREFORK_PORT", "8000"))
+WORKERS = int(os.getenv("PREFORK_WORKERS", str(os.cpu_count() or 1)))
+# Private (non-shared) memory a worker may hold before it is recycled; 0 disables recycling.
+MAX_WORKER_MEMORY_MB = int(os.getenv("PREFORK_MAX_WORKER_MEMORY_MB", "0"))
+MEMORY_CHECK_INTERVAL = float(os.getenv("PREFORK_MEMORY_CHECK_INTERVAL", "5"))
+GRACEFUL_TIMEOUT = int(os.getenv("PREFORK_GRACEFUL_TIMEOUT", "30"))
+# Agents not warmed in the parent unless named in --agents; ADK still loads them lazily in a
+# worker when selected. The planner agent calls the model at import time.
+SKIP_AGENTS = os.getenv("PREFORK_SKIP_AGENTS", "planner_ny_weather_time_planner_agent")
@@ -0,0 +1,233 @@
+import gc
+import logging
+import math
+from collections.abc import Callable
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+_TICK_SECONDS = 0.5
+# Grace on top of uvicorn's own shutdown timeout so SIGKILL never cuts lifespan shutdown short.
+_KILL_MARGIN_SECONDS = 5
+# A worker exiting sooner than this after its fork counts as a startup failure.
+# Respawns after one back off exponentially, and the server stops after too many in a row.
+_MIN_WORKER_LIFETIME_SECONDS = 10
+_MAX_BACKOFF_SECONDS = 30
+_MAX_FAST_FAILURES = 5
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Bind the listening socket in the parent so every forked worker accepts on it."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def worker_memory_mb(pid: int) -> float | None:
+    """Memory a worker does not share with the parent, in MB, or None if unknown.
+
+    Pages still shared copy-on-write are excluded, otherwise every worker would
+    be charged for the warmed imports it inherited. That split is only exposed by
+    Linux's /proc/<pid>/smaps_rollup; RSS is no substitute since it counts them.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as rollup:
+            private_kb = sum(
+                int(line.split()[1])
+                for line in rollup
+                if line.startswith(("Private_Clean:", "Private_Dirty:"))
+            )
+    except OSError:
+        return None
+    return private_kb / 1024
+
+
+class PreforkServer:
+    """Keeps `workers` forked processes serving one socket with a warmed ASGI app.
+
+    Each worker gets its app from app_factory, called after the fork. Returning
+    an app built in the parent shares it copy-on-write; building it inside the
+    factory gives each worker its own connections (e.g. a session database).
+
+    Workers that exceed max_worker_memory_mb are sent SIGTERM (uvicorn drains
+    in-flight requests) and replaced straight away; the old worker is killed if
+    it is still alive a few seconds after uvicorn's graceful_timeout expires.
+    Workers that keep dying right after startup are respawned with backoff, and
+    the server gives up once that looks permanent (a broken app or lifespan).
+    """
+
+    def __init__(
+        self,
+        app_factory: Callable[[], object],
+        sock: socket.socket,
+        workers: int,
+        max_worker_memory_mb: int = 0,
+        memory_check_interval: float = 5.0,
+        graceful_timeout: int = 30,
+    ):
+        self.app_factory = app_factory
+        self.sock = sock
+        self.workers = workers
+        self.max_worker_memory_mb = max_worker_memory_mb
+        self.memory_check_interval = memory_check_interval
+        self.graceful_timeout = graceful_timeout
+        # pid -> kill deadline once the worker is retiring, None while it serves.
+        self._children: dict[int, float | None] = {}
+        self._started: dict[int, float] = {}
+        self._fast_failures = 0
+        self._next_spawn = 0.0
+        self._stopping = False
+        self._exit_code = 0
+
+    def run(self) -> int:
+        """Serve until SIGTERM/SIGINT; returns the process exit code."""
+        # Move everything imported so far out of the GC's reach so collections in
+        # the workers don't write to (and un-share) the parent's pages.
+        gc.collect()
+        gc.freeze()
+
+        if self.max_worker_memory_mb and worker_memory_mb(os.getpid()) is None:
+            logging.warning(
+                "prefork: /proc/<pid>/smaps_rollup unavailable, memory recycling disabled"
+            )
+            self.max_worker_memory_mb = 0
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        logging.info(
+            "prefork: serving on %s with %d workers", self.sock.getsockname(), self.workers
+        )
+
+        next_memory_check = time.monotonic() + self.memory_check_interval
+        while not self._stopping:
+            self._reap()
+            now = time.monotonic()
+            if self.max_worker_memory_mb and now >= next_memory_check:
+                self._recycle_oversized(now)
+                next_memory_check = now + self.memory_check_interval
+            self._kill_overdue(now)
+            if self._fast_failures and self._started and all(
+                now - started >= _MIN_WORKER_LIFETIME_SECONDS
+                for started in self._started.values()
+            ):
+                self._fast_failures = 0
+            while (
+                not self._stopping
+                and now >= self._next_spawn
+                and self._serving_count() < self.workers
+            ):
+                self._spawn()
+            time.sleep(_TICK_SECONDS)
+
+        self._shutdown()
+        return self._exit_code
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _serving_count(self) -> int:
+        return sum(1 for deadline in self._children.values() if deadline is None)
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self._children[pid] = None
+            self._started[pid] = time.monotonic()
+            logging.info("prefork: started worker %d", pid)
+            return
+
+        # Child: never fall back into the parent's loop.
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            config = uvicorn.Config(
+                self.app_factory(), timeout_graceful_shutdown=self.graceful_timeout
+            )
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except SystemExit as exit:
+            # uvicorn exits with a status of its own when startup fails.
+            exit_code = exit.code if isinstance(exit.code, int) else 1
+        except BaseException:
+            logging.exception("prefork: worker %d crashed", os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _reap(self) -> None:
+        while self._children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                return
+            retiring = self._children.pop(pid, None) is not None
+            lifetime = time.monotonic() - self._started.pop(pid, 0.0)
+            if retiring or self._stopping:
+                continue
+            logging.warning(
+                "prefork: worker %d exited unexpectedly (code %d) after %.1fs",
+                pid, os.waitstatus_to_exitcode(status), lifetime,
+            )
+            if lifetime >= _MIN_WORKER_LIFETIME_SECONDS:
+                continue
+            self._fast_failures += 1
+            if self._fast_failures >= max(_MAX_FAST_FAILURES, 2 * self.workers):
+                logging.error(
+                    "prefork: %d workers failed right after startup, stopping",
+                    self._fast_failures,
+                )
+                self._stopping = True
+                self._exit_code = 1
+                return
+            backoff = min(_TICK_SECONDS * 2 ** self._fast_failures, _MAX_BACKOFF_SECONDS)
+            self._next_spawn = time.monotonic() + backoff
+            logging.warning("prefork: delaying respawn by %.1fs", backoff)
+
+    def _recycle_oversized(self, now: float) -> None:
+        for pid, deadline in list(self._children.items()):
+            if deadline is not None:
+                continue
+            memory_mb = worker_memory_mb(pid)
+            # None here means the worker already exited; _reap picks it up.
+            if memory_mb is None or memory_mb <= self.max_worker_memory_mb:
+                continue
+            logging.info(
+                "prefork: recycling worker %d (%.0f MB > %d MB)",
+                pid, memory_mb, self.max_worker_memory_mb,
+            )
+            self._retire(pid, now)
+
+    def _retire(self, pid: int, now: float) -> None:
+        self._children[pid] = now + self.graceful_timeout + _KILL_MARGIN_SECONDS
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _kill_overdue(self, now: float) -> None:
+        for pid, deadline in list(self._children.items()):
+            if deadline is not None and now >= deadline:
+                logging.warning("prefork: worker %d did not exit in time, killing", pid)
+                # Signalled once; it stays in _children until _reap collects it.
+                self._children[pid] = math.inf
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def _shutdown(self) -> None:
+        logging.info("prefork: shutting down %d workers", len(self._children))
+        now = time.monotonic()
+        for pid, deadline in list(self._children.items()):
+            if deadline is None:
+                self._retire(pid, now)
+        while self._children:
+            self._reap()
+            self._kill_overdue(time.monotonic())
+            time.sleep(_TICK_SECONDS)
+        self.sock.close()
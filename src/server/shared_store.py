@@ -0,0 +1,76 @@
+import mmap
+import struct
+from collections.abc import Iterator, Mapping
+
+_COUNT = struct.Struct("<I")
+# key offset, key length, value offset, value length
+_ENTRY = struct.Struct("<IIII")
+
+
+class SharedStore(Mapping[str, str]):
+    """Read-only str -> str mapping packed into an anonymous shared mmap.
+
+    Built once in the pre-fork parent and inherited by every worker. Lookups
+    binary-search raw bytes in the mapping, so workers never touch refcounts of
+    shared Python objects and the pages stay shared instead of being copied.
+
+    Layout: entry count, a table of entries sorted by key bytes, then the
+    UTF-8 encoded keys and values.
+    """
+
+    def __init__(self, buffer: mmap.mmap):
+        self._buffer = buffer
+        (self._count,) = _COUNT.unpack_from(buffer, 0)
+
+    @classmethod
+    def build(cls, items: Mapping[str, str]) -> "SharedStore":
+        entries = sorted((k.encode("utf-8"), v.encode("utf-8")) for k, v in items.items())
+        table_size = _COUNT.size + _ENTRY.size * len(entries)
+        data_size = sum(len(k) + len(v) for k, v in entries)
+        buffer = mmap.mmap(-1, table_size + data_size)
+
+        _COUNT.pack_into(buffer, 0, len(entries))
+        offset = table_size
+        for index, (key, value) in enumerate(entries):
+            key_offset, value_offset = offset, offset + len(key)
+            buffer[key_offset:value_offset] = key
+            buffer[value_offset:value_offset + len(value)] = value
+            _ENTRY.pack_into(
+                buffer, _COUNT.size + _ENTRY.size * index,
+                key_offset, len(key), value_offset, len(value),
+            )
+            offset = value_offset + len(value)
+        return cls(buffer)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._buffer)
+
+    def _entry(self, index: int) -> tuple[int, int, int, int]:
+        return _ENTRY.unpack_from(self._buffer, _COUNT.size + _ENTRY.size * index)
+
+    def _key(self, index: int) -> bytes:
+        key_offset, key_len, _, _ = self._entry(index)
+        return self._buffer[key_offset:key_offset + key_len]
+
+    def __getitem__(self, key: str) -> str:
+        target = key.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count:
+            key_offset, key_len, value_offset, value_len = self._entry(low)
+            if self._buffer[key_offset:key_offset + key_len] == target:
+                return self._buffer[value_offset:value_offset + value_len].decode("utf-8")
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self._count):
+            yield self._key(index).decode("utf-8")
+
+    def __len__(self) -> int:
+        return self._count